@@ -10,18 +10,14 @@ import sys
 import logging
 from sphero_controller import app, socketio, config
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured once by create_app() via logging_setup.configure()
 logger = logging.getLogger("app")
 
 def main():
     """Main entry point for the application."""
     logger.info("Starting Sphero Web Control Interface...")
-    logger.info(f"Using async_mode='{config.SOCKETIO_ASYNC_MODE}'")
-    logger.info(f"Open your browser and navigate to http://localhost:{config.PORT}")
+    logger.info("Using async_mode='%s'", config.SOCKETIO_ASYNC_MODE)
+    logger.info("Open your browser and navigate to http://localhost:%s", config.PORT)
     
     # Run with standard threading mode
     # use_reloader=False is recommended when using threads/signal handling directly
@@ -4,24 +4,34 @@ Sphero Controller Package
 This package provides a web interface for controlling a Sphero robot.
 """
 
+# eventlet must monkey-patch the standard library before anything else
+# imports threading/socket, otherwise greenlets block on native calls.
+import os
+
+if os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet') == 'eventlet':
+    try:
+        import eventlet
+        eventlet.monkey_patch()
+    except ImportError:
+        # Fall back to threaded mode if eventlet isn't installed.
+        os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+
 import logging
+import threading
 from typing import Tuple, Any
 from flask import Flask
 from flask_socketio import SocketIO
+import orjson
 import signal
-import sys
 
 from . import config
+from . import logging_setup
+from . import thread_utils
 from . import sphero_connection
 from . import random_movement
 from . import routes
 from . import socket_handlers
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("sphero_controller")
 
 # Global instances accessed from other modules
@@ -29,22 +39,56 @@ sphero = sphero_connection.sphero
 random_movement_mgr = random_movement.random_movement_manager
 socket_handler = socket_handlers.socket_handlers
 
+class _OrjsonSerializer:
+    """
+    json-module shim backed by orjson for Socket.IO packet encoding.
+
+    engineio expects a str from dumps and ignores the keyword arguments
+    it passes (separators etc. — orjson always emits compact output).
+    Payloads that are already bytes skip JSON entirely and travel as
+    binary Engine.IO frames.
+    """
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    @staticmethod
+    def loads(data: Any, **kwargs: Any) -> Any:
+        return orjson.loads(data)
+
+# Memoized Flask application and Socket.IO instances (built lazily)
+_app = None
+_socketio = None
+
 def create_app() -> Tuple[Flask, SocketIO]:
     """
     Create and configure the Flask application.
-    
+
+    Construction is memoized: route and socket handler registration run
+    exactly once per process, so repeat calls (autoreloader, tests) are
+    an O(1) lookup instead of re-running registration.
+
     Returns:
         Tuple of (app, socketio)
     """
+    global _app, _socketio
+    if _app is not None:
+        return _app, _socketio
+
+    # Configure logging before anything else emits records
+    logging_setup.configure()
+
     # Initialize Flask application
     app = Flask(__name__, template_folder='../templates', static_folder='../static')
     app.config['SECRET_KEY'] = config.FLASK_SECRET_KEY
     
     # Initialize Socket.IO
     socketio = SocketIO(
-        app, 
-        cors_allowed_origins=config.SOCKETIO_CORS_ALLOWED_ORIGINS, 
-        async_mode=config.SOCKETIO_ASYNC_MODE
+        app,
+        cors_allowed_origins=config.SOCKETIO_CORS_ALLOWED_ORIGINS,
+        async_mode=config.SOCKETIO_ASYNC_MODE,
+        json=_OrjsonSerializer
     )
     
     # Register routes and socket handlers
@@ -54,30 +98,80 @@ def create_app() -> Tuple[Flask, SocketIO]:
     # Set up signal handlers
     setup_signal_handlers()
     
-    logger.info(f"Sphero Controller application initialized with async_mode={config.SOCKETIO_ASYNC_MODE}")
+    logger.info("Sphero Controller application initialized with async_mode=%s", config.SOCKETIO_ASYNC_MODE)
+    _app, _socketio = app, socketio
     return app, socketio
 
+# Sentinel so repeated create_app() calls or re-imports only ever install
+# the shutdown machinery once.
+_signals_installed = False
+_signals_lock = threading.Lock()
+
 def setup_signal_handlers() -> None:
-    """Set up signal handlers for graceful shutdown."""
-    signal.signal(signal.SIGINT, cleanup)
-    signal.signal(signal.SIGTERM, cleanup)
+    """Set up signal handling for graceful shutdown (idempotent)."""
+    global _signals_installed
+    with _signals_lock:
+        if _signals_installed:
+            return
+        _signals_installed = True
+
+    shutdown_signals = {signal.SIGINT, signal.SIGTERM}
+
+    if thread_utils.eventlet_active:
+        # cleanup() blocks on the green connection lock and stop events,
+        # which a native thread is never woken from — the teardown has
+        # to run on the hub side. The handler itself only schedules a
+        # greenthread; the hub picks it up on its next iteration, where
+        # blocking on green primitives is legal.
+        import eventlet
+
+        def _handle_signal(signum: int, frame: Any) -> None:
+            eventlet.spawn_n(cleanup, signum, frame)
+
+        for sig in shutdown_signals:
+            signal.signal(sig, _handle_signal)
+    else:
+        # Plain threading mode: block the signals and service them from
+        # a dedicated waiter thread. Unlike an async signal handler,
+        # that thread can safely block on connection_lock — a native
+        # lock here — while closing the Sphero connection.
+        signal.pthread_sigmask(signal.SIG_BLOCK, shutdown_signals)
+
+        def _wait_for_shutdown() -> None:
+            signum = signal.sigwait(shutdown_signals)
+            cleanup(signum, None)
+
+        # The waiter must be a real OS thread: sigwait is an unpatched
+        # blocking syscall, and parking a green thread on it would block
+        # the eventlet hub (and the whole server) the moment it is
+        # scheduled.
+        thread_utils.native_thread(
+            _wait_for_shutdown, name='signal-waiter'
+        ).start()
     logger.info("Signal handlers registered for graceful shutdown")
 
 def cleanup(signum: int, frame: Any) -> None:
     """
     Graceful shutdown: disconnect Sphero.
-    
+
+    Runs on the same side as the connection lock in both modes — a
+    greenthread under eventlet, the native signal waiter thread in
+    threading mode — so blocking on connection_lock here is legal and
+    the hub-side release actually wakes this waiter.
+
     Args:
         signum: Signal number
-        frame: Current stack frame
+        frame: Current stack frame (unused, kept for handler signature)
     """
-    logger.info(f"Received signal {signum}. Shutting down...")
-    
+    logger.info("Received signal %s. Shutting down...", signum)
+
     # Signal random movement to stop
-    random_movement_mgr._stop_random_movement = True
-    
-    # Acquire lock to prevent conflict with connection attempts
-    if sphero.connection_lock.acquire(blocking=True, timeout=2): 
+    random_movement_mgr.request_stop()
+
+    # Acquire the lock so we don't tear the connection down mid-connect.
+    # The 2s timeout bounds shutdown latency if a scan/connect attempt is
+    # holding the lock; worst case we exit without a clean BLE disconnect.
+    if sphero.connection_lock.acquire(blocking=True, timeout=2):
         try:
             if sphero.is_connected and sphero._api_instance:
                 logger.info("Closing Sphero connection...")
@@ -85,7 +179,7 @@ def cleanup(signum: int, frame: Any) -> None:
                     sphero.disconnect_sphero()
                     logger.info("Sphero connection closed.")
                 except Exception as e:
-                    logger.error(f"Error closing connection during shutdown: {e}")
+                    logger.error("Error closing connection during shutdown: %s", e)
             else:
                 logger.info("No active Sphero connection to close.")
         finally:
@@ -95,7 +189,15 @@ def cleanup(signum: int, frame: Any) -> None:
         logger.warning("Could not acquire lock during shutdown, connection might be held.")
 
     logger.info("Exiting.")
-    sys.exit(0)
+    # Called from a greenthread or the signal waiter thread, where
+    # sys.exit() would only end that context; _exit stops the whole
+    # process.
+    os._exit(0)
 
-# Initialize Flask application and Socket.IO when imported
-app, socketio = create_app() 
\ No newline at end of file
+# `app` and `socketio` resolve lazily on first attribute access
+# (PEP 562) so importing the package doesn't construct the app.
+def __getattr__(name: str) -> Any:
+    if name in ('app', 'socketio'):
+        app, socketio = create_app()
+        return app if name == 'app' else socketio
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
@@ -7,17 +7,34 @@ This module contains the configuration settings for the Sphero Web Control Inter
 import os
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file exactly once, even if this
+# module is re-imported or reloaded.
+_dotenv_loaded = False
+
+def _load_dotenv_once() -> None:
+    """Parse the .env file on first call and short-circuit afterwards."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+
+_load_dotenv_once()
+
+# Truthy values accepted for boolean settings (frozenset for O(1) membership)
+_TRUTHY = frozenset({'true', '1', 't'})
 
 # Flask configuration
+# Settings are resolved in a single pass here; Python's module cache makes
+# this the process-wide singleton, so env parsing never repeats.
 FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'sphero-control-secret')
-DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
+DEBUG = os.getenv('DEBUG', 'True').lower() in _TRUTHY
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', '4000'))
 
 # Socket.IO configuration
-SOCKETIO_ASYNC_MODE = 'threading'
+# 'eventlet' enables real WebSocket transport (greenlets instead of a thread
+# per client). Set SOCKETIO_ASYNC_MODE='' to let python-socketio auto-detect.
+SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet') or None
 SOCKETIO_CORS_ALLOWED_ORIGINS = "*"
 
 # Sphero configuration
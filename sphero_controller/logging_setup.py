@@ -0,0 +1,21 @@
+"""
+Logging Setup Module
+
+This module configures logging for the Sphero controller exactly once.
+"""
+
+import functools
+import logging
+
+# Shared log format for the whole application
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+@functools.lru_cache(maxsize=1)
+def configure(level: int = logging.INFO) -> None:
+    """
+    Configure the root logger. Cached so repeat calls are free no-ops.
+
+    Args:
+        level: Logging level for the root logger
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
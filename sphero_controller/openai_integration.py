@@ -5,9 +5,10 @@ This module handles integration with OpenAI APIs for the Sphero controller.
 """
 
 import os
-import json
 import logging
-import requests
+import functools
+import orjson
+import httpx
 import openai
 from typing import Tuple, Dict, Any, Optional, Union
 from dotenv import load_dotenv
@@ -16,17 +17,93 @@ from .sphero_prompts import SPHERO_CONTROL_PROMPT
 # Configure logging
 logger = logging.getLogger("openai_integration")
 
-# Load environment variables from .env file
-load_dotenv()
+# Shared HTTP client so successive REST calls reuse the pooled TCP+TLS
+# connection to api.openai.com instead of re-handshaking every time.
+# HTTP/2 lets concurrent session creations (multiple browser tabs)
+# multiplex over that single connection.
+_http = httpx.Client(
+    http2=True,
+    timeout=10.0,
+    headers={"Content-Type": "application/json"}
+)
 
-# Initialize OpenAI client
-try:
-    openai_client = openai.OpenAI()
-    if not openai_client.api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables.")
-except Exception as e:
-    logger.error(f"Error initializing OpenAI client: {e}")
-    logger.error("Please ensure your OPENAI_API_KEY is set correctly in the .env file.")
+# Request body for realtime transcription sessions, serialized once at
+# import time — only the Authorization header varies between calls.
+_REALTIME_BODY = orjson.dumps({
+    "input_audio_format": "pcm16",
+    "input_audio_transcription": {
+        "model": "gpt-4o-transcribe",
+        "prompt": "",
+        "language": "en"
+    },
+    "turn_detection": {
+        "type": "server_vad",
+        "threshold": 0.5,
+        "prefix_padding_ms": 300,
+        "silence_duration_ms": 200
+    },
+    "input_audio_noise_reduction": {
+        "type": "far_field"
+    }
+})
+
+@functools.lru_cache(maxsize=1)
+def _api_key() -> Optional[str]:
+    """
+    Read the OpenAI API key from the environment, once per process.
+
+    Loading .env lazily here (instead of at import time) means repeated
+    imports or reloads don't re-parse the environment.
+
+    Returns:
+        The API key, or None if not set
+    """
+    key = None
+    try:
+        load_dotenv()
+        key = os.getenv("OPENAI_API_KEY")
+    except Exception as e:
+        logger.error("Error loading environment: %s", e)
+    if not key:
+        logger.error("OPENAI_API_KEY not found in environment variables.")
+        logger.error("Please ensure your OPENAI_API_KEY is set correctly in the .env file.")
+    return key
+
+@functools.lru_cache(maxsize=1)
+def _client() -> openai.OpenAI:
+    """
+    Create the OpenAI client on first use.
+
+    The key is resolved through _api_key() first — the openai.OpenAI
+    constructor raises when no key is set, so probing it up front keeps
+    the missing-key diagnostics on the log path instead of a traceback.
+
+    Returns:
+        The shared OpenAI client instance
+    """
+    # HTTP/2 multiplexes concurrent OpenAI requests over one TLS
+    # connection; the limits keep the pool warm between utterances.
+    return openai.OpenAI(
+        api_key=_api_key(),
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(30.0, connect=5.0)
+        )
+    )
+
+@functools.lru_cache(maxsize=1)
+def _auth_header() -> Dict[str, str]:
+    """
+    Build the Authorization header once per process.
+
+    The key doesn't change for the session lifetime, so there's no need
+    to re-read it and re-format the header string on every request.
+
+    Returns:
+        Header dict with the bearer token
+    """
+    return {"Authorization": f"Bearer {_api_key()}"}
 
 # Define the OpenAI function tool for starting random movement
 start_random_movement_tool = {
@@ -40,18 +117,10 @@ start_random_movement_tool = {
     }
 }
 
-def call_openai_response_api(transcript: str) -> Dict[str, Any]:
-    """
-    Call the OpenAI Response API with the transcript.
-    
-    Args:
-        transcript: The transcript text to send to the API
-        
-    Returns:
-        The API response data or error information
-    """
-
-    json_schema = {
+# Response format schema for the Response API. Built once at import time;
+# the structure is identical for every call, so rebuilding it per request
+# would just churn allocations.
+_RESPONSE_JSON_SCHEMA = {
         "format": {
             "type": "json_schema",
             "name": "command_array",
@@ -104,22 +173,62 @@ def call_openai_response_api(transcript: str) -> Dict[str, Any]:
             "strict": True
             }
         }
-    
 
+# Both Response API entry points keep the request prefix byte-identical
+# across calls: instructions and the schema are frozen module constants
+# and only `input` varies. Provider-side prompt caching keys on exact
+# prefix matches, so never interpolate anything into the instructions.
+
+def call_openai_response_api(transcript: str) -> Dict[str, Any]:
+    """
+    Call the OpenAI Response API with the transcript.
+
+    Args:
+        transcript: The transcript text to send to the API
+
+    Returns:
+        The API response data or error information
+    """
     try:
-        response = openai_client.responses.create(
+        response = _client().responses.create(
             model="gpt-4.1",
             input=transcript,
             instructions=SPHERO_CONTROL_PROMPT,
-            text=json_schema
+            text=_RESPONSE_JSON_SCHEMA
         )
 
         return {"success": True, "data": response.output_text}
     except Exception as e:
         error_message = str(e)
-        logger.error(f"Error calling OpenAI Response API: {error_message}")
+        logger.error("Error calling OpenAI Response API: %s", error_message)
         return {"success": False, "error": error_message}
 
+def stream_openai_response_api(transcript: str):
+    """
+    Call the OpenAI Response API in streaming mode.
+
+    Yields output-text deltas as they arrive so the caller can start
+    executing commands before the full response has been generated.
+
+    Args:
+        transcript: The transcript text to send to the API
+
+    Yields:
+        Output text fragments from the streamed response
+    """
+    try:
+        with _client().responses.stream(
+            model="gpt-4.1",
+            input=transcript,
+            instructions=SPHERO_CONTROL_PROMPT,
+            text=_RESPONSE_JSON_SCHEMA
+        ) as stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+    except Exception as e:
+        logger.error("Error streaming from OpenAI Response API: %s", e)
+
 def create_realtime_session() -> Tuple[bool, Dict[str, Any]]:
     """
     Create an OpenAI Realtime session and return the session details.
@@ -129,44 +238,27 @@ def create_realtime_session() -> Tuple[bool, Dict[str, Any]]:
     """
     try:
         # Make a request to the OpenAI REST API to create a session
-        response = requests.post(
+        response = _http.post(
             "https://api.openai.com/v1/realtime/transcription_sessions",
-            headers={
-                "Authorization": f"Bearer {openai_client.api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "input_audio_format": "pcm16",
-                "input_audio_transcription": {
-                    "model": "gpt-4o-transcribe",
-                    "prompt": "", 
-                    "language": "en"
-                },
-                "turn_detection": {
-                    "type": "server_vad",
-                    "threshold": 0.5,
-                    "prefix_padding_ms": 300,
-                    "silence_duration_ms": 200
-                },
-                "input_audio_noise_reduction": {
-                    "type": "far_field"
-                }
-            }
+            headers=_auth_header(),
+            content=_REALTIME_BODY
         )
         response.raise_for_status() # Raise exception for bad status codes
         logger.info("Successfully created OpenAI Realtime session")
-        return True, response.json()
-        
-    except requests.exceptions.RequestException as e:
+        return True, orjson.loads(response.content)
+
+    except httpx.HTTPStatusError as e:
+        logger.error("Response status: %s", e.response.status_code)
+        logger.error("Response body: %s", e.response.text)
+        error_message = f"{str(e)} - Status: {e.response.status_code}"
+        logger.error("Failed to create OpenAI session: %s", error_message)
+        return False, {"error": f"Failed to create OpenAI session: {error_message}"}
+    except httpx.HTTPError as e:
         error_message = str(e)
-        if e.response is not None:
-            logger.error(f"Response status: {e.response.status_code}")
-            logger.error(f"Response body: {e.response.text}")
-            error_message = f"{error_message} - Status: {e.response.status_code}"
-        logger.error(f"Failed to create OpenAI session: {error_message}")
+        logger.error("Failed to create OpenAI session: %s", error_message)
         return False, {"error": f"Failed to create OpenAI session: {error_message}"}
     except Exception as e:
-        logger.error(f"Unexpected error creating OpenAI session: {str(e)}")
+        logger.error("Unexpected error creating OpenAI session: %s", e)
         return False, {"error": f"Unexpected error creating OpenAI session: {str(e)}"}
 
 def get_openai_api_key() -> Optional[str]:
@@ -176,4 +268,4 @@ def get_openai_api_key() -> Optional[str]:
     Returns:
         The API key or None if not set
     """
-    return openai_client.api_key if openai_client else None 
\ No newline at end of file
+    return _api_key() 
\ No newline at end of file
@@ -6,10 +6,12 @@ Module for processing OpenAI responses and executing Sphero commands.
 import re
 import json
 import logging
-from typing import Tuple, Any, Dict, Optional, List
+import functools
+import orjson
+from typing import Tuple, Any, Callable, Dict, Optional, List
 from . import sphero_connection
 from . import random_movement
-from .openai_integration import call_openai_response_api
+from .openai_integration import call_openai_response_api, stream_openai_response_api
 
 # Configure logging
 logger = logging.getLogger("openai_processor")
@@ -18,6 +20,28 @@ logger = logging.getLogger("openai_processor")
 sphero = sphero_connection.sphero
 random_movement_mgr = random_movement.random_movement_manager
 
+# Compiled once at import so command bursts skip re's per-call cache lookup
+_COLOR_RE = re.compile(r'Color\(r=(\d+),\s*g=(\d+),\s*b=(\d+)\)')
+
+# Responses cached by normalized utterance: users repeat short prompts
+# ("yes", "happy") constantly, and with a strict schema and fixed
+# instructions the reply for a repeat is interchangeable, so serving it
+# from memory skips the whole OpenAI round-trip. Oldest entry is evicted
+# once the cap is hit (dicts iterate in insertion order).
+_RESPONSE_CACHE: Dict[str, str] = {}
+_RESPONSE_CACHE_MAX = 256
+
+# Memoized numeric parsers: LLM command batches repeat the same small
+# argument strings ('0', '100', '1.0'), so these turn repeat conversions
+# into cache probes.
+@functools.lru_cache(maxsize=256)
+def _parse_int(s: str) -> int:
+    return int(s)
+
+@functools.lru_cache(maxsize=128)
+def _parse_float(s: str) -> float:
+    return float(s)
+
 def process_openai_response(server_event: Dict[str, Any], socketio: Any) -> Tuple[bool, Optional[str]]:
     """
     Process OpenAI response data and execute corresponding Sphero commands.
@@ -29,46 +53,145 @@ def process_openai_response(server_event: Dict[str, Any], socketio: Any) -> Tupl
     Returns:
         Tuple of (success, message)
     """
+    if not server_event:
+        return False, 'Invalid OpenAI response data'
+
     try:
-        if not server_event:
-            return False, 'Invalid OpenAI response data'
-        
-        if server_event.get('type') == "conversation.item.input_audio_transcription.completed":
-            logger.info("Input audio transcription completed")
-            logger.debug(f"Server event: {server_event}")
-            transcript = server_event.get('transcript', '')
-            process_response_output(transcript, socketio)
-            return True, 'OpenAI response processed'
-
-        # Handle errors
-        elif server_event.get('type') == "error":
-            error_msg = server_event.get('message', 'Unknown error')
-            logger.error(f"OpenAI Error Event: {error_msg}")
-            return False, f'OpenAI Error: {error_msg}'
-        
+        # Read the event type once and dispatch through the table;
+        # unknown event types fall through as processed no-ops.
+        handler = _EVENT_HANDLERS.get(server_event.get('type'))
+        if handler:
+            return handler(server_event, socketio)
         return True, 'OpenAI response processed'
-            
+
     except Exception as e:
-        logger.error(f"Error processing OpenAI response: {str(e)}")
+        logger.error("Error processing OpenAI response: %s", e)
         return False, f'Error processing response: {str(e)}'
 
+def _handle_transcription_completed(server_event: Dict[str, Any], socketio: Any) -> Tuple[bool, Optional[str]]:
+    """Handle a completed input-audio transcription event."""
+    logger.info("Input audio transcription completed")
+    logger.debug("Server event: %s", server_event)
+    transcript = server_event.get('transcript', '')
+    process_response_output(transcript, socketio)
+    return True, 'OpenAI response processed'
+
+def _handle_error_event(server_event: Dict[str, Any], socketio: Any) -> Tuple[bool, Optional[str]]:
+    """Handle an error event from OpenAI."""
+    error_msg = server_event.get('message', 'Unknown error')
+    logger.error("OpenAI Error Event: %s", error_msg)
+    return False, f'OpenAI Error: {error_msg}'
+
+# Dispatch table mapping OpenAI server event types to handlers
+_EVENT_HANDLERS = {
+    'conversation.item.input_audio_transcription.completed': _handle_transcription_completed,
+    'error': _handle_error_event,
+}
+
 def process_response_output(transcript: str, socketio: Any) -> Tuple[bool, Optional[str]]:
     """
     Process the output items from OpenAI response.
-    
+
+    The Response API is called in streaming mode and each command is
+    executed as soon as its JSON object is complete, so the Sphero
+    starts moving before the full response has finished generating.
+
     Args:
         transcript: The transcript to send to the Response API
         socketio: Flask-SocketIO instance for emitting events
-        
+
     Returns:
         Tuple of (success, message)
     """
-    # Call the OpenAI Response API
-    response_message = call_openai_response_api(transcript)
-    process_transcript(response_message.get("data"), socketio)
-    
+    if not sphero.is_connected:
+        return False, 'Livvy wants to move, but Sphero is not connected.'
+
+    buffer = ''
+    dispatched = 0
+    parse_failed = False
+    # Local bindings keep the per-delta loop on LOAD_FAST lookups
+    scan = _complete_command_objects
+    dispatch = process_command
+
+    # Repeat utterances replay the cached response without an API call
+    cache_key = transcript.strip().lower()
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("Serving cached response for repeated utterance")
+        for obj_text in scan(cached):
+            dispatched += 1
+            try:
+                cmd = orjson.loads(obj_text)
+            except orjson.JSONDecodeError as e:
+                logger.error("JSON parsing error in cached command: %s", e)
+                continue
+            dispatch(cmd.get('command'), cmd.get('parameters', {}))
+        logger.info("Executed %d Sphero commands (cached)", dispatched)
+        return True, 'Response processed'
+
+    for delta in stream_openai_response_api(transcript):
+        buffer += delta
+        for obj_text in scan(buffer)[dispatched:]:
+            dispatched += 1
+            try:
+                cmd = orjson.loads(obj_text)
+            except orjson.JSONDecodeError as e:
+                logger.error("JSON parsing error in streamed command: %s", e)
+                parse_failed = True
+                continue
+            dispatch(cmd.get('command'), cmd.get('parameters', {}))
+
+    # The stream generator yields nothing when the API call fails (the
+    # strict schema otherwise always produces at least an empty commands
+    # array), so an empty buffer means the stream broke — retry through
+    # the non-streaming endpoint instead of dropping the utterance.
+    if not buffer:
+        logger.warning("Streamed response was empty; falling back to non-streaming call")
+        result = call_openai_response_api(transcript)
+        if not result.get('success'):
+            return False, f"OpenAI API error: {result.get('error')}"
+        return process_transcript(result.get('data', ''), socketio)
+
+    # Only completed responses whose commands all parsed are worth
+    # caching; a buffer with a malformed object would fail the same way
+    # on every replay
+    if dispatched and not parse_failed:
+        if len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX:
+            _RESPONSE_CACHE.pop(next(iter(_RESPONSE_CACHE)))
+        _RESPONSE_CACHE[cache_key] = buffer
+
+    logger.info("Executed %d Sphero commands (streamed)", dispatched)
     return True, 'Response processed'
 
+def _complete_command_objects(text: str) -> List[str]:
+    """
+    Find complete JSON objects nested inside the top-level object.
+
+    Used while streaming: elements of the "commands" array close long
+    before the outer object does, so they can be dispatched early.
+
+    Args:
+        text: Partial or complete JSON response text
+
+    Returns:
+        List of complete nested object strings, in order
+    """
+    result = []
+    depth = 0
+    obj_start = 0
+
+    for i, char in enumerate(text):
+        if char == '{':
+            depth += 1
+            if depth == 2:
+                obj_start = i
+        elif char == '}':
+            if depth == 2:
+                result.append(text[obj_start:i+1])
+            depth -= 1
+
+    return result
+
 def handle_random_movement(socketio: Any) -> Tuple[bool, str]:
     """
     Handle random movement function call.
@@ -98,91 +221,114 @@ def process_transcript(transcript: str, socketio: Any) -> Tuple[bool, Optional[s
     Returns:
         Tuple of (success, message)
     """
-    logger.info(f"Processing transcript: {transcript}")
-    
-    if not transcript:
-        return True, None
-    
+    # Bail before any logging or parsing work if there's no Sphero to drive
     if not sphero.is_connected:
         return False, 'Livvy wants to move, but Sphero is not connected.'
-    
+
+    # Log the size, not the transcript itself — large transcripts would
+    # otherwise be materialized into every log record
+    logger.info("Processing transcript (%d chars)", len(transcript) if transcript else 0)
+
+    if not transcript:
+        return True, None
+
     try:
-        # Split multiple JSON objects if needed
-        command_sets = split_json_objects(transcript)
-        total_commands = 0
-        
-        for command_set in command_sets:
-            command_data = json.loads(command_set)
-            commands = command_data.get('commands', [])
-            total_commands += len(commands)
-            
-            for cmd in commands:
-                command_name = cmd.get('command')
-                parameters = cmd.get('parameters', {})
-                process_command(command_name, parameters)
-        
-        logger.info(f"Executed {total_commands} Sphero commands")
+        # Consume concatenated JSON objects with raw_decode: the C JSON
+        # state machine tracks nesting itself, so there's no Python-level
+        # character loop and no re-parse of sliced substrings.
+        # Local binding: the loop body then dispatches via LOAD_FAST
+        # instead of a global lookup per command
+        dispatch = process_command
+
+        # Parse the whole batch first, then dispatch: BLE writes aren't
+        # interleaved with JSON decoding, and a parse error surfaces
+        # before the Sphero starts moving on a partial sequence.
+        pending = []
+        try:
+            # Fast path: the strict schema emits exactly one object,
+            # which orjson decodes at C speed.
+            command_sets = [orjson.loads(transcript)]
+        except orjson.JSONDecodeError:
+            # Concatenated objects: consume them one at a time with
+            # raw_decode, which tracks nesting in C and returns the
+            # offset where each object ends.
+            command_sets = []
+            decoder = json.JSONDecoder()
+            idx = 0
+            n = len(transcript)
+            while idx < n:
+                while idx < n and transcript[idx].isspace():
+                    idx += 1
+                if idx >= n:
+                    break
+                command_data, idx = decoder.raw_decode(transcript, idx)
+                command_sets.append(command_data)
+
+        for command_data in command_sets:
+            for cmd in command_data.get('commands', []):
+                pending.append((cmd.get('command'), cmd.get('parameters', {})))
+
+        for command_name, parameters in pending:
+            dispatch(command_name, parameters)
+
+        logger.info("Executed %d Sphero commands", len(pending))
         return True, 'Livvy executed the commands!'
         
     except json.JSONDecodeError as e:
-        logger.error(f"JSON parsing error: {str(e)}")
+        logger.error("JSON parsing error: %s", e)
         return False, f'Error parsing command data: {str(e)}'
     except Exception as e:
-        logger.error(f"Error processing commands: {str(e)}")
+        logger.error("Error processing commands: %s", e)
         return False, f'Error processing commands: {str(e)}'
 
-def split_json_objects(text: str) -> List[str]:
-    """
-    Split multiple JSON objects in a string.
-    
-    Args:
-        text: String containing potentially multiple JSON objects
-        
-    Returns:
-        List of individual JSON object strings
-    """
-    result = []
-    depth = 0
-    start = 0
-    
-    for i, char in enumerate(text):
-        if char == '{':
-            if depth == 0:
-                start = i
-            depth += 1
-        elif char == '}':
-            depth -= 1
-            if depth == 0:
-                result.append(text[start:i+1])
-    
-    return result
-
 def process_command(command_name: str, parameters: Dict[str, str]) -> None:
     """
     Process and execute a single command.
-    
+
+    Dispatches through a precomputed table, so lookup is one hash probe
+    instead of a chain of string comparisons.
+
     Args:
         command_name: The name of the command to execute
         parameters: The parameters for the command
     """
-    if command_name == 'set_main_led':
-        process_set_color_command(parameters.get('param1', ''))
-    elif command_name == 'roll':
-        heading = parameters.get('param1', '0')
-        speed = parameters.get('param2', '0')
-        duration = parameters.get('param3', '1.0')
-        logger.info(f"Rolling with heading {heading}, speed {speed}, duration {duration}")
-        sphero.roll(int(heading), int(speed), float(duration) if duration else 1.0)
-    elif command_name == 'spin':
-        degrees = parameters.get('param1', '0')
-        duration = parameters.get('param2', '1.0')
-        logger.info(f"Spinning {degrees} degrees over {duration} seconds")
-        sphero.spin(int(degrees), float(duration) if duration else 1.0)
-    elif command_name == 'set_heading':
-        heading = parameters.get('param1', '0')
-        logger.info(f"Setting heading to {heading} degrees")
-        sphero.set_heading(int(heading))
-    # Add more command processors as needed
+    handler = _COMMAND_HANDLERS.get(command_name)
+    if handler:
+        handler(parameters)
+
+def _handle_set_main_led(parameters: Dict[str, str]) -> None:
+    """Execute a set_main_led command from its parameters."""
+    process_set_color_command(parameters.get('param1', ''))
+
+def _handle_roll(parameters: Dict[str, str]) -> None:
+    """Execute a roll command from its parameters."""
+    heading = parameters.get('param1', '0')
+    speed = parameters.get('param2', '0')
+    duration = parameters.get('param3', '1.0')
+    logger.info("Rolling with heading %s, speed %s, duration %s", heading, speed, duration)
+    sphero.roll(_parse_int(heading), _parse_int(speed), _parse_float(duration) if duration else 1.0)
+
+def _handle_spin(parameters: Dict[str, str]) -> None:
+    """Execute a spin command from its parameters."""
+    degrees = parameters.get('param1', '0')
+    duration = parameters.get('param2', '1.0')
+    logger.info("Spinning %s degrees over %s seconds", degrees, duration)
+    sphero.spin(_parse_int(degrees), _parse_float(duration) if duration else 1.0)
+
+def _handle_set_heading(parameters: Dict[str, str]) -> None:
+    """Execute a set_heading command from its parameters."""
+    heading = parameters.get('param1', '0')
+    logger.info("Setting heading to %s degrees", heading)
+    sphero.set_heading(_parse_int(heading))
+
+# Dispatch table mapping command names to handlers.
+# Add more command processors as needed.
+_COMMAND_HANDLERS: Dict[str, Callable[[Dict[str, str]], None]] = {
+    'set_main_led': _handle_set_main_led,
+    'roll': _handle_roll,
+    'spin': _handle_spin,
+    'set_heading': _handle_set_heading,
+}
 
 def process_set_color_command(color_param: str) -> None:
     """
@@ -191,10 +337,9 @@ def process_set_color_command(color_param: str) -> None:
     Args:
         color_param: The color parameter string
     """
-    color_match = re.search(r'Color\(r=(\d+),\s*g=(\d+),\s*b=(\d+)\)', color_param)
+    color_match = _COLOR_RE.search(color_param)
     if color_match:
-        r = int(color_match.group(1))
-        g = int(color_match.group(2))
-        b = int(color_match.group(3))
-        logger.info(f"Setting color to RGB({r},{g},{b})")
+        # groups() hands back all three captures in one call
+        r, g, b = map(int, color_match.groups())
+        logger.info("Setting color to RGB(%d,%d,%d)", r, g, b)
         sphero.set_main_led(r, g, b) 
\ No newline at end of file
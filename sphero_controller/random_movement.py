@@ -10,9 +10,27 @@ import asyncio
 import logging
 from typing import Optional, Tuple, Any, Dict, Callable, Union
 
+from .socket_utils import emit_state
+from .thread_utils import run_blocking
+
 # Configure logging
 logger = logging.getLogger("random_movement")
 
+# Constant payloads for the random_movement_status event, built once at
+# import instead of allocating a fresh dict on every emit. Treat as
+# immutable.
+_RM_ACTIVE: Dict[str, bool] = {'active': True}
+_RM_INACTIVE: Dict[str, bool] = {'active': False}
+
+# Spin angles packed into one int, 8 bits per entry; indexing is a
+# shift+mask instead of a list access
+_DEG_TABLE: int = 45 | 90 << 8 | 180 << 16
+
+# 16-bit threshold for the spin decision: 13107/65536 = 0.19999...,
+# so comparing a 16-bit chunk against it is a Bernoulli(0.2) draw done
+# entirely in integers
+_SPIN_THRESHOLD: int = 13107
+
 class RandomMovement:
     """Class for managing random movement of the Sphero robot."""
     
@@ -25,15 +43,57 @@ class RandomMovement:
         """
         # Will be set later if not provided
         self._sphero_connection = sphero_connection
-        self._stop_random_movement: bool = False
+        self._stop_evt: threading.Event = threading.Event()
+        self._done_evt: threading.Event = threading.Event()
         self._random_movement_task: Optional[asyncio.Task] = None
         self._random_movement_thread: Optional[threading.Thread] = None
         self._is_active: bool = False
-    
+        self._spawn: Optional[Callable[[Any], None]] = None
+        # Instance-local RNG: keeps the movement worker off the shared
+        # module-level Mersenne Twister and its cross-thread contention
+        self._rng: random.Random = random.Random()
+        # True after a roll with non-zero speed; lets the stop sites skip
+        # the roll(0,0,0) BLE write when the ball is already stationary
+        self._moving: bool = False
+        # Buffered random bits for the spin decision: one getrandbits(64)
+        # refill serves four iterations, 16 bits each
+        self._spin_bits: int = 0
+        self._spin_left: int = 0
+
     @property
     def is_active(self) -> bool:
         """Check if random movement is currently active."""
         return self._is_active
+
+    @property
+    def _stop_random_movement(self) -> bool:
+        """Whether the movement loop has been asked to stop."""
+        return self._stop_evt.is_set()
+
+    def _should_spin(self) -> bool:
+        """
+        Draw a Bernoulli(0.2) sample from the buffered bit stream.
+
+        Consumes 16 bits per call and refills the buffer with a single
+        getrandbits(64) every fourth call, replacing a random.random()
+        call and float compare per iteration with integer shift/compare.
+        """
+        if self._spin_left == 0:
+            self._spin_bits = self._rng.getrandbits(64)
+            self._spin_left = 4
+        chunk = self._spin_bits & 0xFFFF
+        self._spin_bits >>= 16
+        self._spin_left -= 1
+        return chunk < _SPIN_THRESHOLD
+
+    def request_stop(self) -> None:
+        """
+        Ask the movement loop to stop without blocking.
+
+        The single sanctioned way for other modules to stop the worker;
+        the stop event itself stays owned by this class.
+        """
+        self._stop_evt.set()
     
     def set_sphero_connection(self, sphero_connection: Any) -> None:
         """
@@ -53,78 +113,87 @@ class RandomMovement:
         """
         try:
             logger.info("Random movement task started.")
+            # No sleep(0) needed: the loop below blocks on BLE calls and
+            # event waits almost immediately, which yields the hub and
+            # flushes the emit
             socketio.emit('status', {'message': 'Random movement started'})
-            socketio.sleep(0)
-            
-            while not self._stop_random_movement:
-                # Check connection status inside the loop
-                if not self._sphero_connection.is_connected or not self._sphero_connection.sphero_api:
+
+            while not self._stop_evt.is_set():
+                # Probe connection state once per iteration and work
+                # through the local binding from here on
+                conn = self._sphero_connection
+                if not conn.is_connected or not conn.sphero_api:
                     logger.warning("Random movement: No longer connected, exiting loop.")
                     break
-                    
+
                 try:
+                    rng = self._rng
                     # Generate a random very dim color (max brightness 40)
-                    r = random.randint(0, 40)
-                    g = random.randint(0, 40)
-                    b = random.randint(0, 40)
-                    self._sphero_connection.set_main_led(r, g, b)
-                    
+                    r = rng.randint(0, 40)
+                    g = rng.randint(0, 40)
+                    b = rng.randint(0, 40)
+                    run_blocking(conn.set_main_led, r, g, b)
+
                     # Generate random direction and very slow speed (max 40)
-                    heading = random.randint(0, 359)
-                    speed = random.randint(10, 40)
-                    
-                    # Roll for a short duration to limit distance
-                    duration = random.uniform(0.5, 1.5)
-                    self._sphero_connection.roll(heading, speed, duration)
-                    
-                    # Longer pause between movements
-                    pause_duration = duration + random.uniform(1.0, 2.0)
-                    logger.info(f"Random movement: Rolling H:{heading} S:{speed} D:{duration:.1f}s, Pausing:{pause_duration:.1f}s")
-                    # Use socketio.sleep for cooperative yielding in threaded mode
-                    socketio.sleep(pause_duration) 
-                    
-                    # Occasionally make the Sphero spin very slowly
-                    if random.random() < 0.2:  # 20% chance to spin
-                        if (self._sphero_connection.is_connected and 
-                            self._sphero_connection.sphero_api and 
-                            not self._stop_random_movement):
-                            # Slow gentle spin, smaller angles
-                            degrees = random.choice([45, 90, 180])
-                            spin_duration = random.uniform(2.0, 3.5)
-                            logger.info(f"Random movement: Spinning {degrees}deg over {spin_duration:.1f}s")
-                            self._sphero_connection.spin(degrees, spin_duration)
-                            # Use socketio.sleep after spin
-                            socketio.sleep(spin_duration + 1.0) 
-                    
+                    heading = rng.randint(0, 359)
+                    speed = rng.randint(10, 40)
+
+                    # Roll for a short duration to limit distance.
+                    # spherov2's roll() blocks for the full duration, so
+                    # by the time it returns the movement is complete.
+                    duration = rng.uniform(0.5, 1.5)
+                    run_blocking(conn.roll, heading, speed, duration)
+                    self._moving = True
+
+                    # Pause between movements: only the gap remains to be
+                    # waited out, the roll itself was already paid above
+                    pause_duration = rng.uniform(1.0, 2.0)
+                    logger.debug("Random movement: Rolling H:%d S:%d D:%.1fs, Pausing:%.1fs", heading, speed, duration, pause_duration)
+                    # Waiting on the stop event doubles as the pause: it
+                    # returns early the instant a stop is requested
+                    if self._stop_evt.wait(pause_duration):
+                        break
+
+                    # Occasionally make the Sphero spin very slowly.
+                    # No connection re-probe here: the next iteration's
+                    # top-of-loop check handles a drop mid-cycle.
+                    if self._should_spin():  # 20% chance to spin
+                        # Slow gentle spin, smaller angles: shift+mask
+                        # pick from the packed angle table
+                        degrees = (_DEG_TABLE >> (rng.randrange(3) << 3)) & 0xFF
+                        spin_duration = rng.uniform(2.0, 3.5)
+                        logger.debug("Random movement: Spinning %ddeg over %.1fs", degrees, spin_duration)
+                        run_blocking(conn.spin, degrees, spin_duration)
+                        if self._stop_evt.wait(spin_duration + 1.0):
+                            break
+
                 except Exception as e:
-                    logger.error(f"Error in random movement loop: {e}")
-                    socketio.sleep(1) # Wait a bit before trying again
-                
-                # Explicit yield in case loop runs long
-                socketio.sleep(0)
-
-            # Stop moving if the loop finishes or is stopped
-            if self._sphero_connection.is_connected and self._sphero_connection.sphero_api:
+                    logger.error("Error in random movement loop: %s", e)
+                    self._stop_evt.wait(1) # Wait a bit before trying again
+
+            # Stop moving if the loop finishes or is stopped; skip the
+            # BLE write when no roll was ever issued
+            if self._moving and self._sphero_connection.is_connected and self._sphero_connection.sphero_api:
                 try:
                     logger.info("Random movement: Stopping Sphero roll.")
-                    self._sphero_connection.roll(0, 0, 0) # Stop moving
+                    run_blocking(self._sphero_connection.roll, 0, 0, 0) # Stop moving
+                    self._moving = False
                 except Exception as e:
-                    logger.error(f"Random movement: Error stopping roll: {e}")
-                    
+                    logger.error("Random movement: Error stopping roll: %s", e)
+
             logger.info("Random movement task finished.")
-            socketio.emit('status', {'message': 'Random movement stopped'})
-            socketio.sleep(0)
-            socketio.emit('random_movement_status', {'active': False})
-            socketio.sleep(0)
+            emit_state(socketio, message='Random movement stopped',
+                       random_movement_active=False)
             self._is_active = False
-        
+
         except Exception as e:
-            logger.error(f"Fatal error in random movement task: {e}")
-            socketio.emit('status', {'message': f'Random movement error: {str(e)}'})
-            socketio.sleep(0)
-            socketio.emit('random_movement_status', {'active': False})
-            socketio.sleep(0)
+            logger.error("Fatal error in random movement task: %s", e)
+            emit_state(socketio, message=f'Random movement error: {str(e)}',
+                       random_movement_active=False)
             self._is_active = False
+        finally:
+            # Confirm loop exit to anyone blocked in stop_random_movement_command
+            self._done_evt.set()
     
     async def _async_random_movement(self, socketio: Any) -> None:
         """
@@ -135,7 +204,8 @@ class RandomMovement:
         """
         try:
             logger.info("Async random movement task started.")
-            socketio.emit('status', {'message': 'Random movement started'})
+            emit = socketio.emit
+            emit('status', {'message': 'Random movement started'})
             
             while not self._stop_random_movement:
                 # Check connection status inside the loop
@@ -144,63 +214,66 @@ class RandomMovement:
                     break
                     
                 try:
+                    rng = self._rng
                     # Generate a random very dim color (max brightness 40)
-                    r = random.randint(0, 40)
-                    g = random.randint(0, 40)
-                    b = random.randint(0, 40)
+                    r = rng.randint(0, 40)
+                    g = rng.randint(0, 40)
+                    b = rng.randint(0, 40)
                     self._sphero_connection.set_main_led(r, g, b)
-                    
+
                     # Generate random direction and very slow speed (max 40)
-                    heading = random.randint(0, 359)
-                    speed = random.randint(10, 40)
+                    heading = rng.randint(0, 359)
+                    speed = rng.randint(10, 40)
                     
-                    # Roll for a short duration to limit distance
-                    duration = random.uniform(0.5, 1.5)
+                    # Roll for a short duration to limit distance.
+                    # roll() blocks for the full duration, so only the
+                    # gap between movements needs sleeping afterwards.
+                    duration = rng.uniform(0.5, 1.5)
                     self._sphero_connection.roll(heading, speed, duration)
-                    
-                    # Longer pause between movements
-                    pause_duration = duration + random.uniform(1.0, 2.0)
-                    logger.info(f"Random movement: Rolling H:{heading} S:{speed} D:{duration:.1f}s, Pausing:{pause_duration:.1f}s")
+                    self._moving = True
+
+                    # Pause between movements
+                    pause_duration = rng.uniform(1.0, 2.0)
+                    logger.debug("Random movement: Rolling H:%d S:%d D:%.1fs, Pausing:%.1fs", heading, speed, duration, pause_duration)
                     # Use asyncio.sleep for async cooperative yielding
                     await asyncio.sleep(pause_duration) 
                     
                     # Occasionally make the Sphero spin very slowly
-                    if random.random() < 0.2:  # 20% chance to spin
-                        if (self._sphero_connection.is_connected and 
-                            self._sphero_connection.sphero_api and 
+                    if self._should_spin():  # 20% chance to spin
+                        if (self._sphero_connection.is_connected and
+                            self._sphero_connection.sphero_api and
                             not self._stop_random_movement):
                             # Slow gentle spin, smaller angles
-                            degrees = random.choice([45, 90, 180])
-                            spin_duration = random.uniform(2.0, 3.5)
-                            logger.info(f"Random movement: Spinning {degrees}deg over {spin_duration:.1f}s")
+                            degrees = (_DEG_TABLE >> (rng.randrange(3) << 3)) & 0xFF
+                            spin_duration = rng.uniform(2.0, 3.5)
+                            logger.debug("Random movement: Spinning %ddeg over %.1fs", degrees, spin_duration)
                             self._sphero_connection.spin(degrees, spin_duration)
                             # Use asyncio.sleep after spin
                             await asyncio.sleep(spin_duration + 1.0) 
                     
                 except Exception as e:
-                    logger.error(f"Error in async random movement loop: {e}")
+                    logger.error("Error in async random movement loop: %s", e)
                     await asyncio.sleep(1) # Wait a bit before trying again
-                
-                # Explicit yield in case loop runs long
-                await asyncio.sleep(0)
 
-            # Stop moving if the loop finishes or is stopped
-            if self._sphero_connection.is_connected and self._sphero_connection.sphero_api:
+            # Stop moving if the loop finishes or is stopped; skip the
+            # BLE write when no roll was ever issued
+            if self._moving and self._sphero_connection.is_connected and self._sphero_connection.sphero_api:
                 try:
                     logger.info("Random movement: Stopping Sphero roll.")
                     self._sphero_connection.roll(0, 0, 0) # Stop moving
+                    self._moving = False
                 except Exception as e:
-                    logger.error(f"Random movement: Error stopping roll: {e}")
-                    
+                    logger.error("Random movement: Error stopping roll: %s", e)
+
             logger.info("Async random movement task finished.")
-            socketio.emit('status', {'message': 'Random movement stopped'})
-            socketio.emit('random_movement_status', {'active': False})
+            emit('status', {'message': 'Random movement stopped'})
+            emit('random_movement_status', _RM_INACTIVE)
             self._is_active = False
-        
+
         except Exception as e:
-            logger.error(f"Fatal error in async random movement task: {e}")
+            logger.error("Fatal error in async random movement task: %s", e)
             socketio.emit('status', {'message': f'Random movement error: {str(e)}'})
-            socketio.emit('random_movement_status', {'active': False})
+            socketio.emit('random_movement_status', _RM_INACTIVE)
             self._is_active = False
     
     def start_random_movement(self, socketio: Any) -> Tuple[bool, str]:
@@ -218,38 +291,81 @@ class RandomMovement:
             return False, 'Cannot start random movement: Not connected to Sphero'
         
         logger.info("Start random movement request received.")
-        # Signal any existing thread to stop
-        self._stop_random_movement = True
-        if self._random_movement_thread and self._random_movement_thread.is_alive():
+        # Signal any existing thread to stop and wait for it to hand the
+        # radio off, so two workers never interleave BLE writes. The
+        # worker is a patched thread, so this join suspends only the
+        # calling greenlet under eventlet, not the hub.
+        self._stop_evt.set()
+        old_thread = self._random_movement_thread
+        if old_thread is not None:
             logger.info("Waiting for existing random movement thread to stop...")
-        
+            old_thread.join(timeout=2.0)
+            if old_thread.is_alive():
+                # Never clear a stop event a live worker still observes:
+                # that would revive the old loop alongside the new one,
+                # exactly the two-writer race this sequencing prevents.
+                logger.warning("Previous random movement thread did not stop in time; not starting a new one.")
+                return False, 'Random movement is still stopping, try again shortly'
+            self._random_movement_thread = None
+
         # Start new random movement task using socketio background task
         logger.info("Starting new random movement background task.")
-        self._stop_random_movement = False
+        self._stop_evt.clear()
+        self._done_evt.clear()
         self._is_active = True
         
-        # Determine if we're using async mode or threaded mode based on socketio async_mode
-        if hasattr(socketio, 'async_mode') and socketio.async_mode == 'asyncio':
-            # Use asyncio for async mode
-            try:
-                loop = asyncio.get_event_loop()
-                self._random_movement_task = loop.create_task(self._async_random_movement(socketio))
-            except RuntimeError:
-                # Fallback to using the thread-based approach if asyncio isn't available
-                self._random_movement_thread = socketio.start_background_task(
-                    self._random_movement_function, socketio
-                )
-        else:
-            # Use threaded mode
-            self._random_movement_thread = socketio.start_background_task(
-                self._random_movement_function, socketio
-            )
-        
-        socketio.emit('random_movement_status', {'active': True})
-        socketio.sleep(0)
+        # The spawn strategy depends only on the socketio async mode, so
+        # resolve it once and reuse the bound callable on later starts
+        if self._spawn is None:
+            self._spawn = self._resolve_spawn(socketio)
+        self._spawn(socketio)
         
+        # The handler returns straight after this emit; the transport
+        # flushes on that yield, no explicit hub switch required
+        socketio.emit('random_movement_status', _RM_ACTIVE)
+
         return True, 'Random movement started'
     
+    def _resolve_spawn(self, socketio: Any) -> Callable[[Any], None]:
+        """
+        Pick the task-spawn strategy for this SocketIO instance.
+
+        Called once on the first start instead of re-probing the async
+        mode (and creating an event loop as a side effect) per start.
+
+        Args:
+            socketio: Flask-SocketIO instance
+
+        Returns:
+            Callable that launches the movement worker
+        """
+        if getattr(socketio, 'async_mode', None) == 'asyncio':
+            def spawn(sio: Any) -> None:
+                # get_running_loop avoids get_event_loop's deprecation
+                # and implicit loop creation
+                self._random_movement_task = asyncio.get_running_loop().create_task(
+                    self._async_random_movement(sio)
+                )
+        else:
+            def spawn(sio: Any) -> None:
+                # The worker stays on the patched Thread deliberately:
+                # green under eventlet, native in threading mode. That
+                # keeps the stop/done Events, join and emits on the same
+                # side as the handlers that use them — green primitives
+                # never wake waiters across the green/native boundary.
+                # The blocking BLE calls themselves go through
+                # run_blocking, which proxies them to eventlet's tpool so
+                # they never run on the hub.
+                thread = threading.Thread(
+                    target=self._random_movement_function,
+                    args=(sio,),
+                    name='random-movement',
+                    daemon=True
+                )
+                thread.start()
+                self._random_movement_thread = thread
+        return spawn
+
     def stop_random_movement_command(self, socketio: Any) -> Tuple[bool, str]:
         """
         Stop the random movement mode.
@@ -261,18 +377,27 @@ class RandomMovement:
             Tuple of (success, message)
         """
         logger.info("Stop random movement request received.")
-        self._stop_random_movement = True
-        
-        # Wait a short moment for the background task to potentially stop itself via the flag
-        socketio.sleep(0.1) 
+        self._stop_evt.set()
+
+        # Block only until the worker confirms it has exited (bounded),
+        # rather than paying a fixed 100ms sleep on every stop request.
+        # Both ends of this handshake live on the patched side — the
+        # worker sets the event from a green thread, this wait runs on a
+        # handler greenlet — so the set wakes the wait immediately; a
+        # native worker would leave this burning the full timeout.
+        if self._is_active:
+            if not self._done_evt.wait(timeout=2.0):
+                logger.warning("Random movement worker did not confirm exit within 2s.")
 
-        # Ensure the Sphero stops moving regardless of thread state
-        if self._sphero_connection and self._sphero_connection.is_connected:
+        # Ensure the Sphero stops moving, unless the worker already
+        # issued its own stop roll on the way out
+        if self._moving and self._sphero_connection and self._sphero_connection.is_connected:
             try:
                 logger.info("Ensuring Sphero roll is stopped.")
-                self._sphero_connection.roll(0, 0, 0) # Stop moving
+                run_blocking(self._sphero_connection.roll, 0, 0, 0) # Stop moving
+                self._moving = False
             except Exception as e:
-                logger.error(f"Error stopping movement: {str(e)}")
+                logger.error("Error stopping movement: %s", e)
                 return False, f'Error stopping movement: {str(e)}'
         
         self._is_active = False
@@ -19,7 +19,11 @@ def register_routes(app: Flask) -> None:
     Args:
         app: Flask application instance
     """
-    
+    # Idempotence guard: registering twice would raise Flask's
+    # "overwriting an existing endpoint" AssertionError
+    if 'index' in app.view_functions:
+        return
+
     @app.route('/')
     def index():
         """Render the main web interface."""
@@ -41,5 +45,5 @@ def register_routes(app: Flask) -> None:
             logger.info("OpenAI Realtime session created successfully.")
             return jsonify(response_data)
         else:
-            logger.error(f"Error creating OpenAI session: {response_data.get('error')}")
+            logger.error("Error creating OpenAI session: %s", response_data.get('error'))
             return jsonify(response_data), 500 
\ No newline at end of file
@@ -5,14 +5,82 @@ This module contains the socket event handlers for controlling the Sphero robot.
 """
 
 import logging
-from typing import Any, Dict, Optional, Callable
+import threading
+from typing import Any, Dict, Optional, Callable, Tuple
 from . import sphero_connection
 from . import random_movement
 from . import openai_processor
+from .socket_utils import emit_state
 
 # Configure logging
 logger = logging.getLogger("socket_handlers")
 
+class _CommandCoalescer:
+    """
+    Coalesce bursts of movement/LED commands down to the newest payload.
+
+    A fast client slider can enqueue dozens of set_color events per
+    second, each of which would otherwise take its turn on the blocking
+    BLE API. Only the latest payload per command survives a flush
+    window; superseded ones are dropped before they reach the radio.
+    """
+
+    def __init__(self,
+                 dispatch: Callable[[str, Dict[str, Any]], Tuple[bool, str]],
+                 max_rate_hz: float = 30.0) -> None:
+        """
+        Initialize the coalescer.
+
+        Args:
+            dispatch: Callable invoked with (command name, payload)
+            max_rate_hz: Maximum flushes per second
+        """
+        self._dispatch = dispatch
+        self._interval = 1.0 / max_rate_hz
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker_started = False
+
+    def submit(self, socketio: Any, name: str, payload: Dict[str, Any]) -> None:
+        """
+        Queue a command, replacing any not-yet-flushed payload of the
+        same name.
+
+        Args:
+            socketio: Flask-SocketIO instance for the flush worker
+            name: Command name ('set_color', 'roll', ...)
+            payload: Raw event data from the client
+        """
+        with self._lock:
+            self._latest[name] = payload
+            if not self._worker_started:
+                self._worker_started = True
+                socketio.start_background_task(self._run, socketio)
+        self._wake.set()
+
+    def _run(self, socketio: Any) -> None:
+        """Flush the newest payload per command at most max_rate_hz."""
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while True:
+                with self._lock:
+                    if not self._latest:
+                        break
+                    batch, self._latest = self._latest, {}
+                message = None
+                for name, payload in batch.items():
+                    try:
+                        success, message = self._dispatch(name, payload)
+                    except Exception as e:
+                        logger.error("Error executing %s: %s", name, e)
+                        message = f'Error executing {name}: {str(e)}'
+                if message:
+                    # One aggregated status per flush, not per message
+                    socketio.emit('status', {'message': message})
+                socketio.sleep(self._interval)
+
 class SocketHandlers:
     """Class for handling socket.io events for the Sphero controller."""
     
@@ -32,6 +100,35 @@ class SocketHandlers:
         self.sphero = sphero_conn or sphero_connection.sphero
         self.random_movement = rand_movement or random_movement.random_movement_manager
         self.openai_processor = openai_proc or openai_processor
+        # Burst commands are coalesced: only the newest payload per
+        # command within a flush window reaches the BLE stack
+        self.max_rate_hz: float = 30.0
+        self._coalescer = _CommandCoalescer(self._dispatch_command, self.max_rate_hz)
+        # Dedupes concurrent auto-connect attempts without tying up the
+        # shared connection lock for the whole scan
+        self._auto_connect_guard = threading.Lock()
+
+    def _dispatch_command(self, name: str, data: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        Execute a coalesced client command against the Sphero API.
+
+        Args:
+            name: Command name ('set_color', 'roll', 'spin', 'set_heading')
+            data: Raw event data from the client
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if name == 'set_color':
+            return self.sphero.set_main_led(int(data['r']), int(data['g']), int(data['b']))
+        if name == 'roll':
+            return self.sphero.roll(int(data['heading']), int(data['speed']),
+                                    float(data.get('duration', 1.0)))
+        if name == 'spin':
+            return self.sphero.spin(int(data['degrees']), float(data.get('duration', 1.0)))
+        if name == 'set_heading':
+            return self.sphero.set_heading(int(data['heading']))
+        return False, f'Unknown command: {name}'
     
     def register_handlers(self, socketio: Any) -> None:
         """
@@ -40,146 +137,101 @@ class SocketHandlers:
         Args:
             socketio: Flask-SocketIO instance
         """
-        
+        # Bind the hot lookups once at registration; the closures then
+        # hit locals (LOAD_FAST) instead of walking self/socketio
+        # attribute chains on every event
+        sphero = self.sphero
+        rand_movement = self.random_movement
+        submit = self._coalescer.submit
+        start_background_task = socketio.start_background_task
+        emit = socketio.emit
+
         @socketio.on('connect')
         def handle_connect() -> None:
             """Handle client connection."""
             logger.info("Client connected")
             # Attempt auto-connect when a client connects if not already connected
-            if not self.sphero.is_connected:
+            if not sphero.is_connected:
                 logger.info("Client connected, starting auto-connect task...")
-                socketio.start_background_task(self.attempt_auto_connect, socketio)
+                start_background_task(self.attempt_auto_connect, socketio)
             else:
-                # Inform the new client about the current status
+                # Inform the new client about the current status in one frame
                 logger.info("Client connected, already connected to Sphero.")
-                socketio.emit('connection_status', {'connected': True})
-                socketio.emit('status', {'message': f'Already connected to {self.sphero.sphero_toy}'})
+                emit_state(socketio, connected=True,
+                           message=f'Already connected to {sphero.sphero_toy}')
 
         @socketio.on('check_connection_status')
         def handle_check_connection() -> None:
             """Handle checking connection status."""
             logger.info("Checking connection status...")
-            socketio.emit('connection_status', {'connected': self.sphero.is_connected})
-            if not self.sphero.is_connected:
+            emit_state(socketio, connected=sphero.is_connected)
+            if not sphero.is_connected:
                 # If not connected, trigger an auto-connect attempt
                 logger.info("Not connected, starting auto-connect task...")
-                socketio.start_background_task(self.attempt_auto_connect, socketio)
+                start_background_task(self.attempt_auto_connect, socketio)
             else:
-                logger.info(f"Already connected to {self.sphero.sphero_toy}.")
+                logger.info("Already connected to %s.", sphero.sphero_toy)
 
         @socketio.on('disconnect_from_sphero')
         def handle_disconnect() -> None:
             """Disconnect from the currently connected Sphero toy."""
             logger.info("Disconnect request received.")
-            
-            # Stop random movement if it's running
-            self.random_movement._stop_random_movement = True
-            if self.random_movement._random_movement_thread and self.random_movement._random_movement_thread.is_alive():
-                logger.info("Waiting for random movement thread to stop...")
-                # Wait up to 2 seconds
-                # Note: This might not be reliable with socketio async modes
-            
-            # Try to acquire the lock briefly to avoid disconnecting during connection
-            if self.sphero.connection_lock.acquire(blocking=True, timeout=1): 
-                try:
-                    success, message = self.sphero.disconnect_sphero()
-                    socketio.emit('connection_status', {'connected': self.sphero.is_connected})
-                    socketio.sleep(0)
-                    socketio.emit('status', {'message': message})
-                    socketio.sleep(0)
-                    logger.info(f"Disconnect result: {message}")
-                finally:
-                    self.sphero.connection_lock.release()
-                    logger.info("Connection lock released after disconnect.")
-            else:
-                logger.warning("Could not acquire lock, connection/disconnection likely in progress.")
-                socketio.emit('status', {'message': 'Cannot disconnect, operation in progress.'})
+            # The BLE teardown can take seconds; run it off the socket
+            # worker so other clients stay responsive meanwhile
+            start_background_task(self.perform_disconnect, socketio)
 
         @socketio.on('set_color')
         def handle_set_color(data: Dict[str, Any]) -> None:
             """
             Set the main LED color of the Sphero.
-            
+
             Args:
                 data: Dictionary containing 'r', 'g', 'b' values
             """
-            try:
-                r = int(data['r'])
-                g = int(data['g'])
-                b = int(data['b'])
-                
-                success, message = self.sphero.set_main_led(r, g, b)
-                socketio.emit('status', {'message': message})
-            except Exception as e:
-                logger.error(f"Error setting color: {e}")
-                socketio.emit('status', {'message': f'Error setting color: {str(e)}'})
+            submit(socketio, 'set_color', data)
 
         @socketio.on('roll')
         def handle_roll(data: Dict[str, Any]) -> None:
             """
             Make the Sphero roll in a specific direction.
-            
+
             Args:
                 data: Dictionary containing 'heading', 'speed', and optionally 'duration'
             """
-            try:
-                heading = int(data['heading'])
-                speed = int(data['speed'])
-                duration = float(data.get('duration', 1.0))
-                
-                success, message = self.sphero.roll(heading, speed, duration)
-                socketio.emit('status', {'message': message})
-            except Exception as e:
-                logger.error(f"Error rolling: {e}")
-                socketio.emit('status', {'message': f'Error rolling: {str(e)}'})
+            submit(socketio, 'roll', data)
 
         @socketio.on('spin')
         def handle_spin(data: Dict[str, Any]) -> None:
             """
             Make the Sphero spin in place.
-            
+
             Args:
                 data: Dictionary containing 'degrees' and optionally 'duration'
             """
-            try:
-                degrees = int(data['degrees'])
-                duration = float(data.get('duration', 1.0))
-                
-                success, message = self.sphero.spin(degrees, duration)
-                socketio.emit('status', {'message': message})
-            except Exception as e:
-                logger.error(f"Error spinning: {e}")
-                socketio.emit('status', {'message': f'Error spinning: {str(e)}'})
+            submit(socketio, 'spin', data)
 
         @socketio.on('set_heading')
         def handle_set_heading(data: Dict[str, Any]) -> None:
             """
             Set the Sphero's heading (orientation).
-            
+
             Args:
                 data: Dictionary containing 'heading' value in degrees (0-359)
             """
-            try:
-                heading = int(data['heading'])
-                
-                success, message = self.sphero.set_heading(heading)                
-                socketio.emit('status', {'message': message})
-            except Exception as e:
-                logger.error(f"Error setting heading: {e}")
-                socketio.emit('status', {'message': f'Error setting heading: {str(e)}'})
+            submit(socketio, 'set_heading', data)
 
         @socketio.on('start_random_movement')
         def handle_start_random_movement() -> None:
             """Start the random movement mode."""
-            success, message = self.random_movement.start_random_movement(socketio)
+            success, message = rand_movement.start_random_movement(socketio)
             if not success:
-                socketio.emit('status', {'message': message})
+                emit('status', {'message': message})
 
         @socketio.on('stop_random_movement')
         def handle_stop_random_movement() -> None:
             """Stop the random movement mode."""
-            success, message = self.random_movement.stop_random_movement_command(socketio)
-            socketio.emit('status', {'message': message})
+            success, message = rand_movement.stop_random_movement_command(socketio)
+            emit('status', {'message': message})
             socketio.sleep(0)
 
         @socketio.on('process_openai_response')
@@ -192,19 +244,62 @@ class SocketHandlers:
             """
             logger.info("Received OpenAI response for processing")
             server_event = data.get('event')
-            
-            # Use the openai_processor module to process the response
-            success, message = self.openai_processor.process_openai_response(server_event, socketio)
-            
-            # Send status message back to the client
-            if message:
-                socketio.emit('openai_status', {'message': message})
+
+            # Process in a background task so the handler returns
+            # immediately instead of blocking its worker for the full
+            # OpenAI round-trip; concurrent utterances overlap in flight.
+            start_background_task(self.process_openai_event, server_event, socketio)
 
         @socketio.on('disconnect')
         def handle_client_disconnect() -> None:
             """Handle client disconnect."""
             logger.info("Client disconnected.")
 
+    def perform_disconnect(self, socketio: Any) -> None:
+        """
+        Stop random movement and tear down the Sphero connection.
+
+        Runs as a background task so the blocking BLE disconnect never
+        holds up a Socket.IO worker.
+
+        Args:
+            socketio: Flask-SocketIO instance for emitting events
+        """
+        # Stop random movement if it's running
+        self.random_movement.request_stop()
+        if self.random_movement._random_movement_thread and self.random_movement._random_movement_thread.is_alive():
+            logger.info("Waiting for random movement thread to stop...")
+            self.random_movement._random_movement_thread.join(timeout=2.0)
+
+        # Try to acquire the lock briefly to avoid disconnecting during connection
+        if self.sphero.connection_lock.acquire(blocking=True, timeout=1):
+            try:
+                success, message = self.sphero.disconnect_sphero()
+                emit_state(socketio, connected=self.sphero.is_connected,
+                           message=message)
+                logger.info("Disconnect result: %s", message)
+            finally:
+                self.sphero.connection_lock.release()
+                logger.info("Connection lock released after disconnect.")
+        else:
+            logger.warning("Could not acquire lock, connection/disconnection likely in progress.")
+            socketio.emit('status', {'message': 'Cannot disconnect, operation in progress.'})
+
+    def process_openai_event(self, server_event: Dict[str, Any], socketio: Any) -> None:
+        """
+        Process an OpenAI server event and report the result to clients.
+
+        Runs as a background task so Socket.IO workers aren't held for
+        the duration of the OpenAI API call.
+
+        Args:
+            server_event: The OpenAI server event data
+            socketio: Flask-SocketIO instance for emitting events
+        """
+        success, message = self.openai_processor.process_openai_response(server_event, socketio)
+        if message:
+            socketio.emit('openai_status', {'message': message})
+
     def attempt_auto_connect(self, socketio: Any) -> None:
         """
         Attempt to scan and connect to the first available Sphero toy.
@@ -212,43 +307,49 @@ class SocketHandlers:
         Args:
             socketio: Flask-SocketIO instance for emitting events
         """
-        logger.info("Attempting to acquire connection lock...")
-        # Prevent multiple concurrent connection attempts
-        if not self.sphero.connection_lock.acquire(blocking=False):
-            logger.warning("Auto-connection attempt already in progress. Lock not acquired.")
+        # Prevent multiple concurrent auto-connect attempts; the BLE scan
+        # deliberately runs outside the shared connection lock so
+        # disconnect and shutdown aren't blocked behind a 10s sweep
+        if not self._auto_connect_guard.acquire(blocking=False):
+            logger.warning("Auto-connection attempt already in progress.")
             return
-        logger.info("Connection lock acquired.")
-        
+
         try:
             if self.sphero.is_connected:
                 logger.info("Already connected.")
-                return # Lock will be released in finally
+                return
 
             # Emit status update
-            socketio.emit('status', {'message': 'Scanning for Sphero toys...'})
+            emit_state(socketio, message='Scanning for Sphero toys...')
             logger.info("Scanning for Sphero toys...")
             toys = self.sphero.scan_for_spheros(timeout=10)
 
             if not toys:
                 logger.warning("No Sphero toys found.")
-                socketio.emit('status', {'message': 'No Sphero toys found.'})
-                socketio.emit('connection_status', {'connected': False})
-                return # Lock will be released in finally
+                emit_state(socketio, connected=False, message='No Sphero toys found.')
+                return
 
             toy = toys[0]
-            logger.info(f"Found {len(toys)} toy(s). Attempting to connect to: {toy}")
-            socketio.emit('status', {'message': f'Found {toy}. Connecting...'})
-            socketio.sleep(0) # Yield control before blocking call
+            logger.info("Found %d toy(s). Attempting to connect to: %s", len(toys), toy)
+            emit_state(socketio, message=f'Found {toy}. Connecting...')
+
+            # Only the connect itself needs the shared connection lock
+            if not self.sphero.connection_lock.acquire(blocking=True, timeout=5):
+                logger.warning("Connection lock busy, aborting auto-connect.")
+                emit_state(socketio, message='Cannot connect, operation in progress.')
+                return
+            try:
+                if self.sphero.is_connected:
+                    logger.info("Already connected.")
+                    return
+                success, message = self.sphero.connect_to_sphero(toy)
+            finally:
+                self.sphero.connection_lock.release()
+                logger.info("Connection lock released after connect attempt.")
+            emit_state(socketio, connected=self.sphero.is_connected, message=message)
 
-            success, message = self.sphero.connect_to_sphero(toy)
-            socketio.emit('connection_status', {'connected': self.sphero.is_connected})
-            socketio.sleep(0)
-            socketio.emit('status', {'message': message})
-            socketio.sleep(0)
-                
         finally:
-            logger.info("Releasing connection lock.")
-            self.sphero.connection_lock.release()
+            self._auto_connect_guard.release()
 
 # Create a singleton instance with default dependencies
 socket_handlers = SocketHandlers() 
\ No newline at end of file
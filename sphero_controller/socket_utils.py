@@ -0,0 +1,39 @@
+"""
+Socket Utility Module
+
+Helpers shared by the socket handlers and background workers.
+"""
+
+import logging
+from typing import Any, Optional
+
+logger = logging.getLogger("socket_utils")
+
+def emit_state(socketio: Any,
+               connected: Optional[bool] = None,
+               message: Optional[str] = None,
+               random_movement_active: Optional[bool] = None) -> None:
+    """
+    Emit a consolidated state_update event.
+
+    Bundles connection state, a status message, and the random movement
+    flag into one frame, instead of emitting each as its own event with
+    a cooperative yield after every one.
+
+    Args:
+        socketio: Flask-SocketIO instance for emitting events
+        connected: Connection state, if it changed
+        message: Status message for the client, if any
+        random_movement_active: Random movement state, if it changed
+    """
+    payload = {}
+    if connected is not None:
+        payload['connected'] = connected
+    if message is not None:
+        payload['message'] = message
+    if random_movement_active is not None:
+        payload['random_movement_active'] = random_movement_active
+
+    if payload:
+        socketio.emit('state_update', payload)
+        socketio.sleep(0)
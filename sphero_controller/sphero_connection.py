@@ -4,9 +4,13 @@ Sphero Connection Module
 This module handles the connection to Sphero robots using the spherov2 library.
 """
 
+import functools
+import json
 import logging
+import os
 import sys
 import threading
+import time
 from typing import Optional, Tuple, Any, List, Dict, Union
 
 try:
@@ -19,26 +23,103 @@ except ImportError:
     sys.exit(1)
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("sphero_connection")
 
+# Shared result for commands issued while disconnected; built once
+# instead of per rejected call
+_NOT_CONNECTED: Tuple[bool, str] = (False, "Not connected to any Sphero")
+
+# Last-known-good toy name, persisted so restarts can target the scan
+# instead of a blind discovery sweep
+_TOY_CACHE_PATH = os.path.expanduser('~/.sphero_cache.json')
+
+def _load_cached_toy_name() -> Optional[str]:
+    """Return the persisted last-connected toy name, if any."""
+    try:
+        with open(_TOY_CACHE_PATH) as f:
+            return json.load(f).get('name')
+    except (OSError, ValueError):
+        return None
+
+def _save_cached_toy_name(name: str) -> None:
+    """Persist the last-connected toy name; failures are non-fatal."""
+    try:
+        with open(_TOY_CACHE_PATH, 'w') as f:
+            json.dump({'name': name}, f)
+    except OSError as e:
+        logger.debug("Could not write toy cache: %s", e)
+
+@functools.lru_cache(maxsize=4096)
+def _color(r: int, g: int, b: int) -> Color:
+    """
+    Return a cached Color for the given channels.
+
+    Color instances are immutable, and after brightness clamping the
+    set of values in play is small (random movement stays within
+    0-40 per channel), so repeat writes reuse one object instead of
+    allocating per call.
+    """
+    return Color(r, g, b)
+
 class SpheroConnection:
     """Class for managing Sphero robot connections."""
-    
+
+    # Fixed attribute set: slot loads skip the per-instance dict and
+    # keep the singleton's footprint minimal
+    __slots__ = (
+        '_sphero_toy',
+        '_sphero_api',
+        '_is_connected',
+        '_api_instance',
+        '_connection_lock',
+        '_max_speed',
+        '_max_brightness',
+        '_brightness_lut',
+        '_last_rgb',
+        '_status_snapshot',
+    )
+
     def __init__(self) -> None:
         """Initialize a new SpheroConnection instance."""
         self._sphero_toy: Any = None
         self._sphero_api: Optional[SpheroEduAPI] = None
         self._is_connected: bool = False
         self._api_instance: Any = None  # Will hold the context manager instance
+        # The package __init__ monkey-patches the stdlib before this
+        # module is imported, so under eventlet this is a green lock
+        # (waiters yield to the hub) and in plain threading mode a
+        # native one. Green waiters and releases never cross the
+        # green/native thread boundary, so every acquirer must live on
+        # the patched side: socket handlers, background tasks and the
+        # eventlet signal path are all hub-side greenlets. Native
+        # threads — tpool workers, the threading-mode signal waiter —
+        # must never touch this lock under eventlet.
         self._connection_lock: threading.Lock = threading.Lock()
         
         # Configurable settings
         self._max_speed: int = 30  # Maximum allowed speed (0-255)
         self._max_brightness: int = 50  # Maximum brightness limit (0-255)
+        # Brightness scaling as a 256-entry lookup table, rebuilt only
+        # when the limit changes, plus a memo of the last color written
+        # so identical frames skip the BLE write entirely
+        self._brightness_lut: bytes = self._build_brightness_lut(self._max_brightness)
+        self._last_rgb: Optional[Tuple[int, int, int]] = None
+        # Status payload rebuilt only on connect/disconnect transitions;
+        # get_connection_status hands it out as-is, so treat as immutable
+        self._status_snapshot: Dict[str, Any] = {'connected': False, 'toy': None}
+
+    @staticmethod
+    def _build_brightness_lut(limit: int) -> bytes:
+        """
+        Build the 256-entry brightness scaling table for a limit.
+
+        Args:
+            limit: Brightness limit (0-255)
+
+        Returns:
+            bytes where entry i is i scaled by limit/255
+        """
+        return bytes((i * limit) // 255 for i in range(256))
     
     @property
     def is_connected(self) -> bool:
@@ -77,21 +158,46 @@ class SpheroConnection:
     
     @max_brightness.setter
     def max_brightness(self, value: int) -> None:
-        """Set the maximum brightness limit."""
+        """Set the maximum brightness limit and rebuild the scaling table."""
         self._max_brightness = max(0, min(255, value))
+        self._brightness_lut = self._build_brightness_lut(self._max_brightness)
+        # A repeated color must be re-sent under the new limit
+        self._last_rgb = None
     
     def scan_for_spheros(self, timeout: int = 10) -> List[Any]:
         """
-        Scan for available Sphero toys.
-        
+        Scan for available Sphero toys, returning as soon as one is found.
+
+        The previous single scan always waited the full timeout even
+        when a toy answered immediately. This version tries the cached
+        last-connected toy by name first, then runs short scan slices
+        until the deadline, exiting on the first hit.
+
         Args:
-            timeout: Time in seconds to scan for devices
-            
+            timeout: Total time budget in seconds
+
         Returns:
             List of found Sphero toys
         """
-        logger.info(f"Scanning for Sphero toys with timeout={timeout}s")
-        return scanner.find_toys(toy_names=None, timeout=timeout)
+        logger.info("Scanning for Sphero toys with timeout=%ds", timeout)
+        deadline = time.monotonic() + timeout
+
+        # Fast path: a targeted scan for the toy we connected to last
+        cached = _load_cached_toy_name()
+        if cached:
+            logger.info("Trying cached toy %r first...", cached)
+            toys = scanner.find_toys(toy_names=[cached], timeout=2)
+            if toys:
+                return toys
+
+        # Short scan slices with an early exit beat one long sweep
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            toys = scanner.find_toys(toy_names=None, timeout=min(2, remaining))
+            if toys:
+                return toys
     
     def connect_to_sphero(self, toy: Any) -> Tuple[bool, str]:
         """
@@ -103,7 +209,7 @@ class SpheroConnection:
         Returns:
             Tuple of (success, message)
         """
-        logger.info(f"Attempting to connect to: {toy}")
+        logger.info("Attempting to connect to: %s", toy)
         
         try:
             api_context = SpheroEduAPI(toy)
@@ -112,15 +218,21 @@ class SpheroConnection:
             self._sphero_api = api_instance
             self._sphero_toy = toy
             self._is_connected = True
-            logger.info(f"Connected to {toy}")
+            self._last_rgb = None
+            self._status_snapshot = {'connected': True, 'toy': str(toy)}
+            toy_name = getattr(toy, 'name', None)
+            if toy_name:
+                _save_cached_toy_name(toy_name)
+            logger.info("Connected to %s", toy)
             return True, f"Connected to {toy}!"
         except Exception as e:
-            logger.error(f"Connection Exception: {str(e)}")
+            logger.error("Connection Exception: %s", e)
             # Clean up partial connection
             self._sphero_toy = None
             self._api_instance = None
             self._sphero_api = None
             self._is_connected = False
+            self._status_snapshot = {'connected': False, 'toy': None}
             return False, f"Connection error: {str(e)}"
     
     def disconnect_sphero(self) -> Tuple[bool, str]:
@@ -135,16 +247,18 @@ class SpheroConnection:
             return False, "Not connected to any Sphero"
         
         try:
-            logger.info(f"Disconnecting from {self._sphero_toy}...")
+            logger.info("Disconnecting from %s...", self._sphero_toy)
             self._api_instance.__exit__(None, None, None)
             self._api_instance = None
             self._sphero_api = None
             self._is_connected = False
             self._sphero_toy = None
+            self._last_rgb = None
+            self._status_snapshot = {'connected': False, 'toy': None}
             logger.info("Successfully disconnected")
             return True, "Disconnected from Sphero"
         except Exception as e:
-            logger.error(f"Error disconnecting: {str(e)}")
+            logger.error("Error disconnecting: %s", e)
             return False, f"Error disconnecting: {str(e)}"
     
     def get_connection_status(self) -> Dict[str, Any]:
@@ -154,10 +268,8 @@ class SpheroConnection:
         Returns:
             Dictionary with connection status information
         """
-        return {
-            'connected': self._is_connected,
-            'toy': str(self._sphero_toy) if self._sphero_toy else None
-        }
+        # Precomputed on connect/disconnect; no str() of the toy per call
+        return self._status_snapshot
     
     def set_brightness_limit(self, limit: int) -> Tuple[bool, str]:
         """
@@ -170,13 +282,13 @@ class SpheroConnection:
             Tuple of (success, message)
         """
         try:
-            # Ensure value is in range 0-255
-            limit = max(0, min(255, limit))
-            self._max_brightness = limit
-            logger.info(f"Brightness limit set to {limit}")
+            # The property setter clamps and rebuilds the scaling table
+            self.max_brightness = limit
+            limit = self._max_brightness
+            logger.info("Brightness limit set to %d", limit)
             return True, f'Brightness limit set to {limit}'
         except Exception as e:
-            logger.error(f"Error setting brightness limit: {str(e)}")
+            logger.error("Error setting brightness limit: %s", e)
             return False, f'Error setting brightness limit: {str(e)}'
     
     def set_main_led(self, r: int, g: int, b: int) -> Tuple[bool, str]:
@@ -193,26 +305,30 @@ class SpheroConnection:
         """
         if not self._is_connected or not self._sphero_api:
             logger.warning("Set color attempted when not connected")
-            return False, "Not connected to any Sphero"
-        
+            return _NOT_CONNECTED
+
+        # Validation and scaling can't raise; only the BLE write needs
+        # the exception frame
+        r = max(0, min(255, r))
+        g = max(0, min(255, g))
+        b = max(0, min(255, b))
+
+        # Skip the BLE write when the frame is identical to the last
+        if (r, g, b) == self._last_rgb:
+            return True, f'Color already RGB({r},{g},{b})'
+
+        # Apply brightness limit via the precomputed table
+        lut = self._brightness_lut
+        r_adj, g_adj, b_adj = lut[r], lut[g], lut[b]
+
         try:
-            # Ensure values are in range 0-255
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            
-            # Apply brightness limit
-            brightness_factor = self._max_brightness / 255.0
-            r_adj = int(r * brightness_factor)
-            g_adj = int(g * brightness_factor)
-            b_adj = int(b * brightness_factor)
-            
-            self._sphero_api.set_main_led(Color(r=r_adj, g=g_adj, b=b_adj))
-            logger.info(f"Color set to RGB({r},{g},{b}) with brightness {self._max_brightness}")
-            return True, f'Color set to RGB({r},{g},{b}) with brightness {self._max_brightness}'
+            self._sphero_api.set_main_led(_color(r_adj, g_adj, b_adj))
         except Exception as e:
-            logger.error(f"Error setting color: {str(e)}")
+            logger.error("Error setting color: %s", e)
             return False, f'Error setting color: {str(e)}'
+        self._last_rgb = (r, g, b)
+        logger.info("Color set to RGB(%d,%d,%d) with brightness %d", r, g, b, self._max_brightness)
+        return True, f'Color set to RGB({r},{g},{b}) with brightness {self._max_brightness}'
     
     def roll(self, heading: int, speed: int, duration: float) -> Tuple[bool, str]:
         """
@@ -228,19 +344,19 @@ class SpheroConnection:
         """
         if not self._is_connected or not self._sphero_api:
             logger.warning("Roll attempted when not connected")
-            return False, "Not connected to any Sphero"
-        
+            return _NOT_CONNECTED
+
+        # Ensure values are in valid ranges
+        heading = max(0, min(359, heading))
+        speed = max(0, min(self._max_speed, speed))
+
         try:
-            # Ensure values are in valid ranges
-            heading = max(0, min(359, heading))
-            speed = max(0, min(self._max_speed, speed))
-            
             self._sphero_api.roll(heading, speed, duration)
-            logger.info(f"Rolling with heading {heading}, speed {speed}")
-            return True, f'Rolling with heading {heading}, speed {speed}'
         except Exception as e:
-            logger.error(f"Error rolling: {str(e)}")
+            logger.error("Error rolling: %s", e)
             return False, f'Error rolling: {str(e)}'
+        logger.info("Rolling with heading %d, speed %d", heading, speed)
+        return True, f'Rolling with heading {heading}, speed {speed}'
     
     def spin(self, degrees: int, duration: float) -> Tuple[bool, str]:
         """
@@ -255,15 +371,15 @@ class SpheroConnection:
         """
         if not self._is_connected or not self._sphero_api:
             logger.warning("Spin attempted when not connected")
-            return False, "Not connected to any Sphero"
-        
+            return _NOT_CONNECTED
+
         try:
             self._sphero_api.spin(degrees, duration)
-            logger.info(f"Spinning {degrees} degrees over {duration} seconds")
-            return True, f'Spinning {degrees} degrees'
         except Exception as e:
-            logger.error(f"Error spinning: {str(e)}")
+            logger.error("Error spinning: %s", e)
             return False, f'Error spinning: {str(e)}'
+        logger.info("Spinning %d degrees over %s seconds", degrees, duration)
+        return True, f'Spinning {degrees} degrees'
 
     def set_heading(self, heading: int) -> Tuple[bool, str]:
         """
@@ -277,17 +393,24 @@ class SpheroConnection:
         """
         if not self._is_connected or not self._sphero_api:
             logger.warning("Set heading attempted when not connected")
-            return False, "Not connected to any Sphero"
-        
+            return _NOT_CONNECTED
+
+        heading = max(0, min(359, heading))
+
         try:
-            heading = max(0, min(359, heading))
-            # Use roll with zero speed to set heading
-            self._sphero_api.roll(heading, 0, 0.1)
-            logger.info(f"Set heading to {heading}°")
-            return True, f'Set heading to {heading}°'
+            # Prefer the API's own heading command: it returns as soon
+            # as the aim is sent, where the zero-speed roll fallback
+            # sleeps ~100ms per call
+            api_set_heading = getattr(self._sphero_api, 'set_heading', None)
+            if api_set_heading is not None:
+                api_set_heading(heading)
+            else:
+                self._sphero_api.roll(heading, 0, 0.1)
         except Exception as e:
-            logger.error(f"Error setting heading: {str(e)}")
+            logger.error("Error setting heading: %s", e)
             return False, f'Error setting heading: {str(e)}'
+        logger.info("Set heading to %d°", heading)
+        return True, f'Set heading to {heading}°'
 
 # Create a singleton instance
 sphero = SpheroConnection() 
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Thread Utilities
+
+Helpers for working across the green/native thread boundary when
+eventlet has monkey-patched the threading module.
+"""
+
+import threading
+
+# Under eventlet's monkey patch threading.Thread is a green thread, so a
+# blocking syscall on it (signal.sigwait, BLE I/O) stalls the hub and
+# with it the whole process. eventlet.patcher.original hands back the
+# unpatched module; without eventlet, threading is already the real one.
+#
+# The converse also holds: green Events and Locks cannot wake waiters
+# across the green/native boundary, so coordination primitives must stay
+# on one side. eventlet_active tells callers which world they are in.
+try:
+    from eventlet import patcher as _patcher, tpool as _tpool
+    _threading = _patcher.original('threading')
+    eventlet_active = _patcher.is_monkey_patched('thread')
+except ImportError:
+    _tpool = None
+    _threading = threading
+    eventlet_active = False
+
+
+def run_blocking(fn, *args):
+    """
+    Run a blocking call without stalling the eventlet hub.
+
+    Under eventlet the call is proxied to the tpool, so only the calling
+    greenlet suspends while a pool thread does the blocking work. In
+    plain threading mode the call runs inline, where blocking is fine.
+
+    Args:
+        fn: Callable performing blocking (BLE, I/O) work
+        args: Positional arguments for the callable
+
+    Returns:
+        The callable's return value
+    """
+    if eventlet_active:
+        return _tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def native_thread(target, name, args=()):
+    """
+    Create a daemon thread backed by a real OS thread in every mode.
+
+    Args:
+        target: Callable to run on the thread
+        name: Thread name
+        args: Positional arguments for the target
+
+    Returns:
+        An unstarted daemon Thread
+    """
+    return _threading.Thread(target=target, name=name, args=args, daemon=True)
@@ -6,24 +6,52 @@ This script uses the official spherov2 library to control Sphero robots.
 It should work with various Sphero models including SPRK+ and variants.
 """
 
+import importlib.util
+import re
 import sys
 import time
 import asyncio
 from typing import Optional, List
 
-try:
-    from spherov2 import scanner
-    from spherov2.sphero_edu import SpheroEduAPI
-    from spherov2.types import Color
-except ImportError:
+# Check availability from package metadata before importing: find_spec
+# only probes the finders, so a missing install is reported without
+# paying for (or half-executing) the spherov2/bleak import machinery.
+if importlib.util.find_spec("spherov2") is None:
     print("Error: spherov2 module not found!")
     print("Please install it with: pip install spherov2")
     sys.exit(1)
 
+from spherov2 import scanner
+from spherov2.sphero_edu import SpheroEduAPI
+from spherov2.types import Color
+
+def _find_toys_early_exit(timeout=10):
+    """
+    Scan for toys in short slices, returning on the first hit.
+
+    A single find_toys call always waits out its full timeout; scanning
+    in 2-second slices keeps the overall budget but returns within a
+    couple of seconds of the toy appearing.
+
+    Args:
+        timeout: Total scan budget in seconds
+
+    Returns:
+        List of found Sphero toys (possibly empty)
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return []
+        toys = scanner.find_toys(toy_names=None, timeout=min(2, remaining))
+        if toys:
+            return toys
+
 def list_available_toys():
     """Scan and list all available Sphero toys."""
-    print("Scanning for Sphero toys (10 seconds)...")
-    available_toys = scanner.find_toys(toy_names=None)
+    print("Scanning for Sphero toys (up to 10 seconds)...")
+    available_toys = _find_toys_early_exit()
     
     if not available_toys:
         print("No Sphero toys found! Make sure your device is:")
@@ -31,49 +59,70 @@ def list_available_toys():
         print("2. Not connected to another device")
         return []
     
-    print(f"\nFound {len(available_toys)} Sphero toys:")
-    for i, toy in enumerate(available_toys):
-        print(f"{i+1}. {toy}")
-    
+    # One joined write instead of a print per toy — a single flush to
+    # the terminal no matter how many toys showed up
+    print(f"\nFound {len(available_toys)} Sphero toys:\n"
+          + "\n".join(f"{i+1}. {toy}" for i, toy in enumerate(available_toys)))
+
     return available_toys
 
+# Fixed demo palette and the interpolated ramp frames, built once at
+# import — Color objects are immutable, so every demo run reuses them
+_WHITE = Color(r=255, g=255, b=255)
+_RED = Color(r=255, g=0, b=0)
+_GREEN = Color(r=0, g=255, b=0)
+_BLUE = Color(r=0, g=0, b=255)
+_YELLOW = Color(r=255, g=255, b=0)
+_PURPLE = Color(r=128, g=0, b=128)
+
+_RAMP_STEPS = 10
+_COLOR_RAMP = (
+    [Color(r=int(255 * (1 - i / _RAMP_STEPS)), g=int(255 * i / _RAMP_STEPS), b=0)
+     for i in range(_RAMP_STEPS + 1)] +
+    [Color(r=0, g=int(255 * (1 - i / _RAMP_STEPS)), b=int(255 * i / _RAMP_STEPS))
+     for i in range(_RAMP_STEPS + 1)]
+)
+
 def demo_sequences(api):
     """Run a demonstration sequence of commands."""
     print("\nRunning demo sequence...")
 
-    # Light demo
+    # Light demo: ramp red -> green -> blue instead of three hard cuts.
+    # LED writes are fire-and-forget, so the ramp pace is set purely by
+    # the sleep between frames.
     print("Changing colors...")
-    api.set_main_led(Color(r=255, g=0, b=0))  # Red
-    time.sleep(1)
-    api.set_main_led(Color(r=0, g=255, b=0))  # Green
-    time.sleep(1)
-    api.set_main_led(Color(r=0, g=0, b=255))  # Blue
-    time.sleep(1)
-    
-    # Movement demo
+    for frame in _COLOR_RAMP:
+        api.set_main_led(frame)
+        time.sleep(0.03)
+
+    # Movement demo. spin() and roll() already block for their full
+    # duration, so extra sleeps between them only add dead time. LED
+    # writes are fire-and-forget, so issuing one right before each move
+    # colors the motion itself at no wall-clock cost.
     try:
         print("Testing movement...")
         # Spin 360 degrees over 2 seconds
+        api.set_main_led(_WHITE)
         api.spin(360, 2)
-        time.sleep(0.5)
-        
+
         # Roll forward at speed 100 for 2 seconds
         print("Rolling forward...")
+        api.set_main_led(_RED)
         api.roll(0, 100, 2)
-        time.sleep(0.5)
-        
+
         # Roll right at speed 100 for 1 second
         print("Rolling right...")
+        api.set_main_led(_GREEN)
         api.roll(90, 100, 1)
-        time.sleep(0.5)
-        
+
         # Roll backward at speed 100 for 1 second
         print("Rolling backward...")
+        api.set_main_led(_BLUE)
         api.roll(180, 100, 1)
-        time.sleep(0.5)
-        
+
         # Roll left at speed 100 for 1 second
         print("Rolling left...")
+        api.set_main_led(_YELLOW)
         api.roll(270, 100, 1)
         
     except Exception as e:
@@ -81,9 +130,56 @@ def demo_sequences(api):
         print("Movement may not be supported on this model.")
     
     # Final color
-    api.set_main_led(Color(r=128, g=0, b=128))  # Purple
+    api.set_main_led(_PURPLE)
     print("Demo completed!")
 
+# Interactive command grammar, compiled once at import. The regexes
+# both validate and capture the arguments, so the loop body is a dict
+# lookup and a match instead of elif chains with per-branch int() guards.
+_CMD_RE = {
+    "color": re.compile(r"color\s+(\d+)\s+(\d+)\s+(\d+)\s*$", re.IGNORECASE),
+    "roll": re.compile(r"roll\s+(\d+)\s+(-?\d+)\s+(\d+(?:\.\d+)?)\s*$", re.IGNORECASE),
+    "spin": re.compile(r"spin\s+(-?\d+)\s+(\d+(?:\.\d+)?)\s*$", re.IGNORECASE),
+}
+
+_CMD_USAGE = {
+    "color": "Format: color <r 0-255> <g 0-255> <b 0-255>",
+    "roll": "Format: roll <heading 0-359> <speed -255-255> <duration>",
+    "spin": "Format: spin <degrees> <duration>",
+}
+
+def _do_color(api, r, g, b):
+    """Execute a validated color command."""
+    # The grammar only matches unsigned digits, so clamping the lower
+    # bound would be dead code — a single min() per channel suffices
+    r = min(255, int(r))
+    g = min(255, int(g))
+    b = min(255, int(b))
+    print(f"Setting color to RGB({r},{g},{b})...")
+    api.set_main_led(Color(r=r, g=g, b=b))
+
+def _do_roll(api, heading, speed, duration):
+    """Execute a validated roll command."""
+    heading = min(359, int(heading))
+    # speed may be negative (reverse), so it clamps symmetrically
+    speed = max(-255, min(255, int(speed)))
+    duration = float(duration)
+    print(f"Rolling with heading {heading}, speed {speed} for {duration} seconds...")
+    api.roll(heading, speed, duration)
+
+def _do_spin(api, degrees, duration):
+    """Execute a validated spin command."""
+    degrees = int(degrees)
+    duration = float(duration)
+    print(f"Spinning {degrees} degrees over {duration} seconds...")
+    api.spin(degrees, duration)
+
+_CMD_DISPATCH = {
+    "color": _do_color,
+    "roll": _do_roll,
+    "spin": _do_spin,
+}
+
 def interactive_mode(toy):
     """Run an interactive mode for controlling the Sphero toy."""
     print(f"\nConnecting to {toy}...")
@@ -95,73 +191,40 @@ def interactive_mode(toy):
             print("\nInteractive Mode:")
             print("Available commands:")
             print("- color <r> <g> <b>  : Set main LED color (values 0-255)")
-            print("- roll <heading> <speed> <duration>  : Roll in a direction (heading 0-359, speed 0-255, duration in seconds)")
+            print("- roll <heading> <speed> <duration>  : Roll in a direction (heading 0-359, speed -255 to 255, negative = reverse, duration in seconds)")
             print("- spin <degrees> <duration>  : Spin in place (degrees 0-360, duration in seconds)")
             print("- demo  : Run a demonstration sequence")
             print("- exit  : Exit the program")
             
             while True:
                 user_input = input("\nCommand> ").strip()
-                
+
                 if not user_input:
                     continue
-                
-                cmd_parts = user_input.split()
-                cmd = cmd_parts[0].lower()
-                
+
+                cmd = user_input.split(None, 1)[0].lower()
+
                 if cmd == "exit":
                     break
-                elif cmd == "color" and len(cmd_parts) >= 4:
-                    try:
-                        r = int(cmd_parts[1])
-                        g = int(cmd_parts[2])
-                        b = int(cmd_parts[3])
-                        
-                        # Ensure values are in range 0-255
-                        r = max(0, min(255, r))
-                        g = max(0, min(255, g))
-                        b = max(0, min(255, b))
-                        
-                        print(f"Setting color to RGB({r},{g},{b})...")
-                        api.set_main_led(Color(r=r, g=g, b=b))
-                    except ValueError:
-                        print("Error: Color values must be numbers between 0-255")
-                
-                elif cmd == "roll" and len(cmd_parts) >= 4:
-                    try:
-                        heading = int(cmd_parts[1])
-                        speed = int(cmd_parts[2])
-                        duration = float(cmd_parts[3])
-                        
-                        # Ensure values are in valid ranges
-                        heading = max(0, min(359, heading))
-                        speed = max(0, min(255, speed))
-                        
-                        print(f"Rolling with heading {heading}, speed {speed} for {duration} seconds...")
-                        api.roll(heading, speed, duration)
-                    except ValueError:
-                        print("Error: Invalid values. Format: roll <heading 0-359> <speed 0-255> <duration>")
-                    except Exception as e:
-                        print(f"Movement error: {e}")
-                
-                elif cmd == "spin" and len(cmd_parts) >= 3:
-                    try:
-                        degrees = int(cmd_parts[1])
-                        duration = float(cmd_parts[2])
-                        
-                        print(f"Spinning {degrees} degrees over {duration} seconds...")
-                        api.spin(degrees, duration)
-                    except ValueError:
-                        print("Error: Invalid values. Format: spin <degrees> <duration>")
-                    except Exception as e:
-                        print(f"Spin error: {e}")
-                
-                elif cmd == "demo":
+                if cmd == "demo":
                     demo_sequences(api)
-                
-                else:
+                    continue
+
+                handler = _CMD_DISPATCH.get(cmd)
+                if handler is None:
                     print("Unknown command or invalid parameters.")
                     print("Available commands: color, roll, spin, demo, exit")
+                    continue
+
+                match = _CMD_RE[cmd].match(user_input)
+                if match is None:
+                    print(f"Error: Invalid values. {_CMD_USAGE[cmd]}")
+                    continue
+
+                try:
+                    handler(api, *match.groups())
+                except Exception as e:
+                    print(f"Command error: {e}")
             
     except Exception as e:
         print(f"Error: {e}")
@@ -174,7 +237,7 @@ def main():
     
     try:
         print("Scanning for Sphero toys...")
-        toys = scanner.find_toys(toy_names=None, timeout=10)
+        toys = _find_toys_early_exit(timeout=10)
         
         if not toys:
             print("No Sphero toys found! Make sure your device is:")
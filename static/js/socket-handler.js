@@ -72,6 +72,24 @@ const SocketHandler = (function() {
         socket.on('status', function(data) {
             elements.statusMessage.innerText = data.message;
         });
+
+        // Consolidated state event: one frame may carry connection
+        // state, a status message and the random movement flag together
+        socket.on('state_update', function(data) {
+            if ('connected' in data) {
+                isConnected = data.connected;
+                UI.updateUIState(isConnected);
+            }
+            if ('message' in data) {
+                elements.statusMessage.innerText = data.message;
+            } else if (data.connected) {
+                elements.statusMessage.innerText = 'Connected to Sphero';
+            }
+            if ('random_movement_active' in data) {
+                isRandomMovementActive = data.random_movement_active;
+                UI.updateRandomMovementUI(isRandomMovementActive);
+            }
+        });
         
         socket.on('random_movement_status', function(data) {
             isRandomMovementActive = data.active;